@@ -10,7 +10,7 @@ class RefreshInfo:
 
     Attributes:
         refresh_time (str): ISO-formatted time string of the refresh.
-        image_hash (int): SHA-256 hash of the image.
+        image_hash (str): Content hash of the image.
         refresh_type (str): Refresh type ['Manual Update', 'Playlist'].
         plugin_id (str): Plugin id of the refresh.
         playlist (str): Playlist name if refresh_type is 'Playlist'.
@@ -3,8 +3,10 @@ import os
 import socket
 import subprocess
 
+from functools import lru_cache
 from pathlib import Path
-from PIL import Image, ImageDraw, ImageFont, ImageOps
+from types import MappingProxyType
+from PIL import ExifTags, Image, ImageDraw, ImageFont, ImageOps
 
 logger = logging.getLogger(__name__)
 
@@ -40,14 +42,18 @@ FONTS = {
     "jost-semibold": "Jost-SemiBold.ttf"
 }
 
+# Read-only font face entries handed to plugin templates, built on first use
+_FONTS_LIST = None
+
+# Default to the src directory
+_DEFAULT_SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 def resolve_path(file_path):
-    src_dir = os.getenv("SRC_DIR")
-    if src_dir is None:
-        # Default to the src directory
-        src_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    
-    src_path = Path(src_dir)
-    return str(src_path / file_path)
+    return _resolve_path(os.getenv("SRC_DIR", _DEFAULT_SRC_DIR), file_path)
+
+@lru_cache(maxsize=256)
+def _resolve_path(src_dir, file_path):
+    return str(Path(src_dir) / file_path)
 
 def get_ip_address():
     with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
@@ -71,6 +77,10 @@ def is_connected():
     except OSError:
         return False
 
+@lru_cache(maxsize=128)
+def _load_truetype(font_path, font_size):
+    return ImageFont.truetype(font_path, font_size)
+
 def get_font(font_name, font_size=50, font_weight="normal"):
     if font_name in FONT_FAMILIES:
         font_variants = FONT_FAMILIES[font_name]
@@ -81,7 +91,7 @@ def get_font(font_name, font_size=50, font_weight="normal"):
 
         if font_entry:
             font_path = resolve_path(os.path.join("static", "fonts", font_entry["file"]))
-            return ImageFont.truetype(font_path, font_size)
+            return _load_truetype(font_path, font_size)
         else:
             logger.warning(f"Requested font weight not found: font_name={font_name}, font_weight={font_weight}")
     else:
@@ -90,16 +100,22 @@ def get_font(font_name, font_size=50, font_weight="normal"):
     return None
 
 def get_fonts():
+    global _FONTS_LIST
+
+    if _FONTS_LIST is not None:
+        return _FONTS_LIST
+
     fonts_list = []
     for font_family, variants in FONT_FAMILIES.items():
         for variant in variants:
-            fonts_list.append({
+            fonts_list.append(MappingProxyType({
                 "font_family": font_family,
                 "url": resolve_path(os.path.join("static", "fonts", variant["file"])),
                 "font_weight": variant.get("font-weight", "normal"),
                 "font_style": variant.get("font-style", "normal"),
-            })
-    return fonts_list
+            }))
+    _FONTS_LIST = tuple(fonts_list)
+    return _FONTS_LIST
 
 def get_font_path(font_name):
     return resolve_path(os.path.join("static", "fonts", FONTS[font_name]))
@@ -115,32 +131,30 @@ def generate_startup_image(dimensions=(800,480)):
     image = Image.new("RGBA", dimensions, bg_color)
     image_draw = ImageDraw.Draw(image)
 
-    title_font_size = width * 0.145
-    image_draw.text((width/2, height/2), "inkypi", anchor="mm", fill=text_color, font=get_font("Jost", title_font_size))
+    title_font = get_font("Jost", width * 0.145)
+    # instructions and IP lines share the same font size
+    text_font = get_font("Jost", width * 0.032)
+
+    image_draw.text((width/2, height/2), "inkypi", anchor="mm", fill=text_color, font=title_font)
 
     text = f"To get started, visit http://{hostname}.local"
-    text_font_size = width * 0.032
 
     # Draw the instructions
     y_text = height * 3 / 4
-    image_draw.text((width/2, y_text), text, anchor="mm", fill=text_color, font=get_font("Jost", text_font_size))
+    image_draw.text((width/2, y_text), text, anchor="mm", fill=text_color, font=text_font)
 
     # Draw the IP on a line below
     ip_text = f"or http://{ip}"
-    ip_text_font_size = width * 0.032
-    bbox = image_draw.textbbox((0, 0), text, font=get_font("Jost", text_font_size))
+    bbox = image_draw.textbbox((0, 0), text, font=text_font)
     text_height = bbox[3] - bbox[1]
     ip_y = y_text + text_height * 1.35
-    image_draw.text((width/2, ip_y), ip_text, anchor="mm", fill=text_color, font=get_font("Jost", ip_text_font_size))
+    image_draw.text((width/2, ip_y), ip_text, anchor="mm", fill=text_color, font=text_font)
 
     return image
 
 def parse_form(request_form):
-    request_dict = request_form.to_dict()
-    for key in request_form.keys():
-        if key.endswith('[]'):
-            request_dict[key] = request_form.getlist(key)
-    return request_dict
+    # single-value keys keep the first value, matching MultiDict.to_dict()
+    return {key: values if key.endswith('[]') else values[0] for key, values in request_form.lists()}
 
 def handle_request_files(request_files, form_data={}):
     allowed_file_extensions = {'pdf', 'png', 'avif', 'jpg', 'jpeg', 'gif', 'webp', 'heif', 'heic'}
@@ -150,6 +164,7 @@ def handle_request_files(request_files, form_data={}):
         is_list = key.endswith('[]')
         if key in form_data:
             file_location_map[key] = form_data.getlist(key) if is_list else form_data.get(key)
+    file_save_dir = resolve_path(os.path.join("static", "images", "saved"))
     # add new files in the request
     for key, file in request_files.items(multi=True):
         is_list = key.endswith('[]')
@@ -157,23 +172,28 @@ def handle_request_files(request_files, form_data={}):
         if not file_name:
             continue
 
-        extension = os.path.splitext(file_name)[1].replace('.', '')
-        if not extension or extension.lower() not in allowed_file_extensions:
+        extension = os.path.splitext(file_name)[1][1:].lower()
+        if extension not in allowed_file_extensions:
             continue
 
         file_name = os.path.basename(file_name)
-
-        file_save_dir = resolve_path(os.path.join("static", "images", "saved"))
         file_path = os.path.join(file_save_dir, file_name)
 
         # Open the image and apply EXIF transformation before saving
         if extension in {'jpg', 'jpeg'}:
             try:
                 with Image.open(file) as img:
-                    img = ImageOps.exif_transpose(img)
-                    img.save(file_path)
+                    orientation = img.getexif().get(ExifTags.Base.Orientation, 1)
+                    if orientation != 1:
+                        img = ImageOps.exif_transpose(img)
+                        img.save(file_path)
+                if orientation == 1:
+                    # No rotation needed, keep the original bytes instead of re-encoding
+                    file.stream.seek(0)
+                    file.save(file_path)
             except Exception as e:
                 logger.warning(f"EXIF processing error for {file_name}: {e}")
+                file.stream.seek(0)
                 file.save(file_path)
         else:
             # Directly save non-JPEG files
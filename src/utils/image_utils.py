@@ -1,22 +1,49 @@
-import requests
+import numpy as np
 from PIL import Image, ImageEnhance, ImageOps, ImageFilter
-from io import BytesIO
+from utils.http_client import get_http_session
 import os
 import logging
 import hashlib
 import tempfile
 import subprocess
 import shutil
+import sys
+from functools import lru_cache
+from io import BytesIO
 
 logger = logging.getLogger(__name__)
 
-def get_image(image_url):
-    response = requests.get(image_url, timeout=30)
+# The image hash is only an equality key for skipping unchanged refreshes, so prefer a fast
+# non-cryptographic digest: BLAKE3 when installed, otherwise SHA-1
+try:
+    from blake3 import blake3 as _image_hasher
+except ImportError:
+    _image_hasher = hashlib.sha1
+
+# Keep screenshot temp files in RAM when tmpfs is available, sparing the SD card a write per refresh
+_TMPDIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+# On Linux Chromium can write the screenshot straight into our stdout pipe, skipping the temp PNG;
+# take_screenshot switches to a temp file if the browser does not support it
+_SCREENSHOT_TO_STDOUT = sys.platform.startswith("linux")
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# ITU-R 601-2 luma weights, as used by Image.convert("L")
+_LUMA_WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+def get_image(image_url, desired_size=None):
     img = None
-    if 200 <= response.status_code < 300 or response.status_code == 304:
-        img = Image.open(BytesIO(response.content))
-    else:
-        logger.error(f"Received non-200 response from {image_url}: status_code: {response.status_code}")
+    with get_http_session().get(image_url, timeout=30, stream=True) as response:
+        if 200 <= response.status_code < 300 or response.status_code == 304:
+            # Read the body straight from the socket instead of buffering response.content first
+            response.raw.decode_content = True
+            img = Image.open(response.raw)
+            if desired_size and img.format == "JPEG":
+                # Let the JPEG decoder scale down by 1/2, 1/4 or 1/8 while staying at least desired_size
+                img.draft(img.mode, tuple(desired_size))
+            img.load()
+        else:
+            logger.error(f"Received non-200 response from {image_url}: status_code: {response.status_code}")
     return img
 
 def change_orientation(image, orientation, inverted=False):
@@ -35,31 +62,33 @@ def resize_image(image, desired_size, image_settings=[]):
     desired_width, desired_height = desired_size
     desired_width, desired_height = int(desired_width), int(desired_height)
 
-    img_ratio = img_width / img_height
     desired_ratio = desired_width / desired_height
 
     keep_width = "keep-width" in image_settings
+    # Bicubic is indistinguishable from Lanczos once dithered for e-ink; plugins can opt back in with "hq"
+    resample = Image.LANCZOS if "hq" in image_settings else Image.BICUBIC
 
-    x_offset, y_offset = 0,0
-    new_width, new_height = img_width,img_height
     # Step 1: Determine crop dimensions
-    desired_ratio = desired_width / desired_height
-    if img_ratio > desired_ratio:
-        # Image is wider than desired aspect ratio
-        new_width = int(img_height * desired_ratio)
-        if not keep_width:
-            x_offset = (img_width - new_width) // 2
-    else:
-        # Image is taller than desired aspect ratio
-        new_height = int(img_width / desired_ratio)
-        if not keep_width:
-            y_offset = (img_height - new_height) // 2
-
-    # Step 2: Crop the image
-    image = image.crop((x_offset, y_offset, x_offset + new_width, y_offset + new_height))
-
-    # Step 3: Resize to the exact desired dimensions (if necessary)
-    return image.resize((desired_width, desired_height), Image.LANCZOS)
+    # A wider image is cropped in width, a taller one in height; the other side keeps its full size
+    new_width = min(img_width, int(img_height * desired_ratio))
+    new_height = min(img_height, int(img_width / desired_ratio))
+    x_offset, y_offset = 0, 0
+    if not keep_width:
+        x_offset = (img_width - new_width) // 2
+        y_offset = (img_height - new_height) // 2
+
+    # Step 2: Crop and resize to the exact desired dimensions in one pass. For large downscales
+    # reducing_gap box-averages the crop by an integer factor first (Image.reduce), so the
+    # resampling filter only sees an input at most ~2x the target size
+    crop_box = (x_offset, y_offset, x_offset + new_width, y_offset + new_height)
+    # Image.resize handles RGBA/LA through a premultiplied copy but drops reducing_gap on the way,
+    # so do that premultiplied round trip here. Transparent pixels keep resizing to black as before
+    premultiplied_modes = {"RGBA": "RGBa", "LA": "La"}
+    if image.mode in premultiplied_modes:
+        resized = image.convert(premultiplied_modes[image.mode]).resize(
+            (desired_width, desired_height), resample, box=crop_box, reducing_gap=2.0)
+        return resized.convert(image.mode)
+    return image.resize((desired_width, desired_height), resample, box=crop_box, reducing_gap=2.0)
 
 def apply_image_enhancement(img, image_settings={}):
     # Convert image to RGB mode if necessary for enhancement operations
@@ -68,31 +97,78 @@ def apply_image_enhancement(img, image_settings={}):
         img = img.convert('RGB')
         
 
-    # Apply Brightness
-    img = ImageEnhance.Brightness(img).enhance(image_settings.get("brightness", 1.0))
+    brightness = image_settings.get("brightness", 1.0)
+    contrast = image_settings.get("contrast", 1.0)
+    saturation = image_settings.get("saturation", 1.0)
 
-    # Apply Contrast
-    img = ImageEnhance.Contrast(img).enhance(image_settings.get("contrast", 1.0))
+    if img.mode == 'RGB':
+        # Apply Brightness, Contrast and Saturation in a single pass over the pixels
+        img = _enhance_rgb(img, brightness, contrast, saturation)
+    else:
+        # A factor of 1.0 returns the input unchanged, so skip those passes
+        # Apply Brightness
+        if brightness != 1.0:
+            img = ImageEnhance.Brightness(img).enhance(brightness)
+
+        # Apply Contrast
+        if contrast != 1.0:
+            img = ImageEnhance.Contrast(img).enhance(contrast)
 
-    # Apply Saturation (Color)
-    img = ImageEnhance.Color(img).enhance(image_settings.get("saturation", 1.0))
+        # Apply Saturation (Color)
+        if saturation != 1.0:
+            img = ImageEnhance.Color(img).enhance(saturation)
 
     # Apply Sharpness
-    img = ImageEnhance.Sharpness(img).enhance(image_settings.get("sharpness", 1.0))
+    sharpness = image_settings.get("sharpness", 1.0)
+    if sharpness != 1.0:
+        img = ImageEnhance.Sharpness(img).enhance(sharpness)
 
     return img
 
+def _enhance_rgb(img, brightness, contrast, saturation):
+    """Fused equivalent of the ImageEnhance Brightness, Contrast and Color blends for RGB images.
+
+    Each step is an affine blend with a degenerate image (black, the mean luma, the per-pixel luma),
+    so they are applied in order on one float buffer instead of allocating an image per step.
+    """
+    if brightness == 1.0 and contrast == 1.0 and saturation == 1.0:
+        return img
+
+    pixels = np.asarray(img, dtype=np.float32)
+
+    if brightness != 1.0:
+        pixels *= brightness
+        np.clip(pixels, 0, 255, out=pixels)
+
+    if contrast != 1.0:
+        mean = np.floor((pixels @ _LUMA_WEIGHTS).mean() + 0.5)
+        pixels *= contrast
+        pixels += (1.0 - contrast) * mean
+        np.clip(pixels, 0, 255, out=pixels)
+
+    if saturation != 1.0:
+        luma = pixels @ _LUMA_WEIGHTS
+        pixels *= saturation
+        pixels += ((1.0 - saturation) * luma)[..., np.newaxis]
+        np.clip(pixels, 0, 255, out=pixels)
+
+    return Image.fromarray(pixels.astype(np.uint8), mode="RGB")
+
+def _ensure_rgb(img):
+    # convert() always copies, even when the image is already RGB
+    return img if img.mode == "RGB" else img.convert("RGB")
+
 def compute_image_hash(image):
-    """Compute SHA-256 hash of an image."""
-    image = image.convert("RGB")
+    """Compute a content hash of an image."""
+    image = _ensure_rgb(image)
     img_bytes = image.tobytes()
-    return hashlib.sha256(img_bytes).hexdigest()
+    return _image_hasher(img_bytes).hexdigest()
 
 def take_screenshot_html(html_str, dimensions, timeout_ms=None):
     image = None
     try:
         # Create a temporary HTML file
-        with tempfile.NamedTemporaryFile(suffix=".html", delete=False) as html_file:
+        with tempfile.NamedTemporaryFile(suffix=".html", dir=_TMPDIR, delete=False) as html_file:
             html_file.write(html_str.encode("utf-8"))
             html_file_path = html_file.name
 
@@ -106,8 +182,12 @@ def take_screenshot_html(html_str, dimensions, timeout_ms=None):
 
     return image
 
+@lru_cache(maxsize=1)
 def _find_chromium_binary():
-    """Find the first available Chromium-based binary in system PATH."""
+    """Find the first available Chromium-based binary in system PATH.
+
+    The result is cached for the lifetime of the process; restart after installing a browser.
+    """
     candidates = ["chromium-headless-shell", "chromium", "chrome"]
     for candidate in candidates:
         path = shutil.which(candidate)
@@ -117,7 +197,48 @@ def _find_chromium_binary():
     return None
 
 
+def _run_chromium_screenshot(browser, target, screenshot_path, dimensions, timeout_ms=None):
+    command = [
+        browser,
+        target,
+        "--headless",
+        f"--screenshot={screenshot_path}",
+        f"--window-size={dimensions[0]},{dimensions[1]}",
+        "--disable-dev-shm-usage",
+        "--disable-gpu",
+        "--use-gl=swiftshader",
+        "--hide-scrollbars",
+        "--in-process-gpu",
+        "--js-flags=--jitless",
+        "--disable-zero-copy",
+        "--disable-gpu-memory-buffer-compositor-resources",
+        "--disable-extensions",
+        "--disable-plugins",
+        "--mute-audio",
+        "--renderer-process-limit=1",
+        "--no-zygote",
+        # Skip first-run and background startup work
+        "--no-first-run",
+        "--no-default-browser-check",
+        "--disable-background-networking",
+        "--disable-sync",
+        "--disable-translate",
+        "--disable-features=TranslateUI,BlinkGenPropertyTrees",
+        "--no-sandbox"
+    ]
+    if timeout_ms:
+        command.append(f"--timeout={timeout_ms}")
+    return subprocess.run(command, capture_output=True, check=False)
+
+def _load_screenshot(source):
+    # Decode the PNG once; drop the unused alpha channel in the same pass instead of copying
+    with Image.open(source) as img:
+        img.load()
+        return _ensure_rgb(img)
+
 def take_screenshot(target, dimensions, timeout_ms=None):
+    global _SCREENSHOT_TO_STDOUT
+
     image = None
     try:
         # Find available browser binary
@@ -126,43 +247,33 @@ def take_screenshot(target, dimensions, timeout_ms=None):
             logger.error("No Chromium-based browser found. Install chromium, chromium-headless-shell, or chrome.")
             return None
 
+        if _SCREENSHOT_TO_STDOUT:
+            result = _run_chromium_screenshot(browser, target, "/dev/stdout", dimensions, timeout_ms)
+            # Skip anything Chromium logged to stdout before the PNG data
+            png_start = result.stdout.find(PNG_SIGNATURE)
+            if png_start >= 0:
+                return _load_screenshot(BytesIO(result.stdout[png_start:]))
+
+            if result.returncode != 0:
+                logger.error(f"Failed to take screenshot (return code: {result.returncode})")
+                return None
+
+            # The browser ran fine but did not write to stdout, use temp files from now on
+            logger.warning("Browser did not write the screenshot to stdout, falling back to a temp file")
+            _SCREENSHOT_TO_STDOUT = False
+
         # Create a temporary output file for the screenshot
-        with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as img_file:
+        with tempfile.NamedTemporaryFile(suffix=".png", dir=_TMPDIR, delete=False) as img_file:
             img_file_path = img_file.name
 
-        command = [
-            browser,
-            target,
-            "--headless",
-            f"--screenshot={img_file_path}",
-            f"--window-size={dimensions[0]},{dimensions[1]}",
-            "--disable-dev-shm-usage",
-            "--disable-gpu",
-            "--use-gl=swiftshader",
-            "--hide-scrollbars",
-            "--in-process-gpu",
-            "--js-flags=--jitless",
-            "--disable-zero-copy",
-            "--disable-gpu-memory-buffer-compositor-resources",
-            "--disable-extensions",
-            "--disable-plugins",
-            "--mute-audio",
-            "--renderer-process-limit=1",
-            "--no-zygote",
-            "--no-sandbox"
-        ]
-        if timeout_ms:
-            command.append(f"--timeout={timeout_ms}")
-        result = subprocess.run(command, capture_output=True, check=False)
+        result = _run_chromium_screenshot(browser, target, img_file_path, dimensions, timeout_ms)
 
         # Check if the process failed or the output file is missing
         if result.returncode != 0 or not os.path.exists(img_file_path):
             logger.error(f"Failed to take screenshot (return code: {result.returncode})")
             return None
 
-        # Load the image using PIL
-        with Image.open(img_file_path) as img:
-            image = img.copy()
+        image = _load_screenshot(img_file_path)
 
         # Remove image files
         os.remove(img_file_path)
@@ -173,8 +284,12 @@ def take_screenshot(target, dimensions, timeout_ms=None):
     return image
 
 def pad_image_blur(img: Image, dimensions: tuple[int, int]) -> Image:
-    bkg = ImageOps.fit(img, dimensions)
-    bkg = bkg.filter(ImageFilter.BoxBlur(8))
+    # Blur a quarter-size backdrop and scale it up; the upscale is itself a low-pass,
+    # so this looks like BoxBlur(8) at full size for 1/16 of the filter work
+    small_size = (max(1, dimensions[0] // 4), max(1, dimensions[1] // 4))
+    bkg = ImageOps.fit(img, small_size, Image.BILINEAR)
+    bkg = bkg.filter(ImageFilter.BoxBlur(2))
+    bkg = bkg.resize(dimensions, Image.BILINEAR)
     img = ImageOps.contain(img, dimensions)
 
     img_size = img.size
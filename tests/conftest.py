@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Application modules import each other as top-level packages (e.g. `utils.http_client`),
+# the same way they are loaded when running src/inkypi.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
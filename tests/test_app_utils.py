@@ -0,0 +1,25 @@
+from werkzeug.datastructures import MultiDict
+
+from utils.app_utils import parse_form
+
+
+class TestParseForm:
+
+    def test_scalar_keys_keep_first_value(self):
+        form = MultiDict([("a", "1"), ("a", "2"), ("c", "")])
+        assert parse_form(form) == {"a": "1", "c": ""}
+
+    def test_list_keys_keep_all_values(self):
+        form = MultiDict([("b[]", "x"), ("b[]", "y"), ("single[]", "z")])
+        assert parse_form(form) == {"b[]": ["x", "y"], "single[]": ["z"]}
+
+    def test_mixed_form(self):
+        form = MultiDict([("a", "1"), ("b[]", "x"), ("a", "2"), ("b[]", "y"), ("c", "")])
+        assert parse_form(form) == {"a": "1", "b[]": ["x", "y"], "c": ""}
+
+    def test_matches_to_dict_for_scalar_keys(self):
+        form = MultiDict([("a", "1"), ("a", "2"), ("b", "3")])
+        assert parse_form(form) == form.to_dict()
+
+    def test_empty_form(self):
+        assert parse_form(MultiDict()) == {}
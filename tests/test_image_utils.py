@@ -0,0 +1,172 @@
+import subprocess
+from io import BytesIO
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw, ImageEnhance
+
+from utils import image_utils
+from utils.image_utils import _enhance_rgb, resize_image, take_screenshot
+
+
+def _random_rgb_image(width=160, height=96, seed=0):
+    rng = np.random.default_rng(seed)
+    return Image.fromarray(rng.integers(0, 256, (height, width, 3), dtype=np.uint8))
+
+
+class TestEnhanceRgb:
+
+    @pytest.mark.parametrize(
+        "brightness,contrast,saturation",
+        [
+            (1.2, 1.3, 0.7),
+            (0.8, 1.0, 1.5),
+            (1.0, 1.5, 1.0),
+            (1.0, 1.0, 0.0),   # full desaturation
+            (0.5, 0.5, 2.0),
+            (2.0, 2.0, 2.0),   # heavy clipping between steps
+        ]
+    )
+    def test_matches_image_enhance_chain(self, brightness, contrast, saturation):
+        img = _random_rgb_image()
+
+        expected = ImageEnhance.Brightness(img).enhance(brightness)
+        expected = ImageEnhance.Contrast(expected).enhance(contrast)
+        expected = ImageEnhance.Color(expected).enhance(saturation)
+
+        result = _enhance_rgb(img, brightness, contrast, saturation)
+
+        assert result.mode == "RGB"
+        assert result.size == img.size
+        diff = np.abs(np.asarray(result, dtype=np.int16) - np.asarray(expected, dtype=np.int16))
+        assert diff.max() <= 2
+
+    def test_default_factors_return_input(self):
+        img = _random_rgb_image()
+        assert _enhance_rgb(img, 1.0, 1.0, 1.0) is img
+
+
+def _reference_crop_box(img_size, desired_size, keep_width):
+    """Crop box computed by the branchy logic resize_image used before it was collapsed into min()."""
+    img_width, img_height = img_size
+    desired_width, desired_height = desired_size
+    img_ratio = img_width / img_height
+    desired_ratio = desired_width / desired_height
+
+    x_offset, y_offset = 0, 0
+    new_width, new_height = img_width, img_height
+    if img_ratio > desired_ratio:
+        new_width = int(img_height * desired_ratio)
+        if not keep_width:
+            x_offset = (img_width - new_width) // 2
+    else:
+        new_height = int(img_width / desired_ratio)
+        if not keep_width:
+            y_offset = (img_height - new_height) // 2
+    return (x_offset, y_offset, x_offset + new_width, y_offset + new_height)
+
+
+class TestResizeImage:
+
+    @pytest.mark.parametrize("img_size", [
+        (800, 480), (480, 800), (1920, 1080), (1080, 1920), (1000, 1000),
+        (801, 481), (799, 479), (333, 777), (4032, 3024), (123, 45),
+    ])
+    @pytest.mark.parametrize("desired_size", [(800, 480), (480, 800)])
+    @pytest.mark.parametrize("keep_width", [False, True])
+    def test_crop_box_matches_reference(self, monkeypatch, img_size, desired_size, keep_width):
+        calls = []
+        original_resize = Image.Image.resize
+
+        def spy_resize(self, size, *args, **kwargs):
+            calls.append(kwargs.get("box"))
+            return original_resize(self, size, *args, **kwargs)
+
+        monkeypatch.setattr(Image.Image, "resize", spy_resize)
+
+        settings = ["keep-width"] if keep_width else []
+        result = resize_image(Image.new("RGB", img_size), desired_size, settings)
+
+        assert result.size == desired_size
+        assert calls == [_reference_crop_box(img_size, desired_size, keep_width)]
+
+    def test_rgba_input_matches_premultiplied_resize(self):
+        # Transparent white background with an opaque red box and a half transparent blue strip
+        img = Image.new("RGBA", (1600, 960), (255, 255, 255, 0))
+        draw = ImageDraw.Draw(img)
+        draw.rectangle((400, 200, 1200, 760), fill=(255, 0, 0, 255))
+        draw.rectangle((0, 800, 400, 959), fill=(0, 0, 255, 128))
+
+        result = resize_image(img, (800, 480))
+        expected = img.resize((800, 480), Image.BICUBIC)
+
+        assert result.mode == "RGBA"
+        assert result.size == (800, 480)
+        diff = np.abs(np.asarray(result, dtype=np.int16) - np.asarray(expected, dtype=np.int16))
+        assert diff.max() <= 2
+
+        rgb = result.convert("RGB")
+        assert rgb.getpixel((0, 0)) == (0, 0, 0)
+        assert rgb.getpixel((400, 240)) == (255, 0, 0)
+        assert rgb.getpixel((100, 450)) == (0, 0, 255)
+
+
+def _png_bytes(size=(80, 48), color=(255, 0, 0)):
+    buffer = BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class TestTakeScreenshot:
+
+    @pytest.fixture
+    def run_calls(self, monkeypatch):
+        """Stub out the browser; tests set `returncode`/`stdout` and inspect the recorded screenshot targets."""
+        calls = []
+        stub = {"returncode": 0, "stdout": b"", "file_png": _png_bytes()}
+
+        def fake_run(command, **kwargs):
+            screenshot_path = next(arg for arg in command if arg.startswith("--screenshot=")).split("=", 1)[1]
+            calls.append(screenshot_path)
+            if screenshot_path != "/dev/stdout":
+                with open(screenshot_path, "wb") as f:
+                    f.write(stub["file_png"])
+                return subprocess.CompletedProcess(command, 0, b"", b"")
+            return subprocess.CompletedProcess(command, stub["returncode"], stub["stdout"], b"")
+
+        monkeypatch.setattr(image_utils, "_find_chromium_binary", lambda: "chromium")
+        monkeypatch.setattr(image_utils.subprocess, "run", fake_run)
+        monkeypatch.setattr(image_utils, "_SCREENSHOT_TO_STDOUT", True)
+        return calls, stub
+
+    def test_png_on_stdout(self, run_calls):
+        calls, stub = run_calls
+        stub["stdout"] = b"[0101/000000.000:INFO] log line\n" + _png_bytes(color=(0, 0, 255))
+
+        image = take_screenshot("file:///page.html", (80, 48))
+
+        assert calls == ["/dev/stdout"]
+        assert image.mode == "RGB"
+        assert image.getpixel((0, 0)) == (0, 0, 255)
+        assert image_utils._SCREENSHOT_TO_STDOUT
+
+    def test_empty_stdout_falls_back_to_temp_file(self, run_calls):
+        calls, stub = run_calls
+
+        image = take_screenshot("file:///page.html", (80, 48))
+
+        assert len(calls) == 2 and calls[0] == "/dev/stdout"
+        assert image.getpixel((0, 0)) == (255, 0, 0)
+        assert not image_utils._SCREENSHOT_TO_STDOUT
+
+        # Later screenshots go straight to the temp file
+        take_screenshot("file:///page.html", (80, 48))
+        assert len(calls) == 3 and calls[2] != "/dev/stdout"
+
+    def test_failed_browser_is_not_retried(self, run_calls):
+        calls, stub = run_calls
+        stub["returncode"] = 1
+
+        assert take_screenshot("file:///page.html", (80, 48)) is None
+        assert calls == ["/dev/stdout"]
+        assert image_utils._SCREENSHOT_TO_STDOUT